@@ -1,162 +1,556 @@
+import asyncio
 import streamlit as st
-import requests
+import httpx
+import diskcache
 import json
 import csv
-from datetime import datetime, timedelta
-import os
+from datetime import datetime, timedelta, timezone
 from dateutil import parser
+import os
 import io
+from itertools import chain
+import random
+import threading
+from collections import OrderedDict
+from operator import itemgetter
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:  # orjson is optional; the stdlib decoder also accepts bytes
+    json_loads = json.loads
 
 # Replace these with your own values or set them as environment variables
 SUBDOMAIN = os.getenv("SUPPORTBEE_SUBDOMAIN", "YOUR_SUBDOMAIN")
 API_TOKEN = os.getenv("SUPPORTBEE_API_TOKEN", "YOUR_API_TOKEN")
 
+# Set SB_DEBUG=1 to show raw API error bodies and cache stats in the UI
+DEBUG = os.getenv("SB_DEBUG") == "1"
+
+# HTTP client: "httpx" multiplexes requests over HTTP/2; "aiohttp" costs less
+# CPU per request when the server only speaks HTTP/1.1
+HTTP_BACKEND = os.getenv("SB_HTTP_BACKEND", "httpx")
+
 # API base URL
 BASE_URL = f"https://{SUBDOMAIN}.supportbee.com"
 
+# Query parameters sent with every request
+AUTH_PARAMS = {"auth_token": API_TOKEN}
+
+# Ticket list parameters; 100 tickets is the largest page SupportBee serves,
+# which keeps the number of page requests to a minimum
+TICKET_LIST_PARAMS = {"sort_by": "last_activity", "per_page": 100}
+
 # Headers for API requests
 HEADERS = {
     "Content-Type": "application/json",
     "Accept": "application/json",
 }
 
-def fetch_all_tickets(start_date, end_date):
-    all_tickets = []
-    page = 1
-    while True:
-        url = (
-            f"{BASE_URL}/tickets"
-            f"?auth_token={API_TOKEN}"
-            f"&since={start_date}"
-            f"&until={end_date}"
-            f"&page={page}"
-            f"&sort_by=last_activity"
-        )
-        response = requests.get(url, headers=HEADERS)
-        
-        if response.status_code != 200:
-            st.error(f"Error fetching tickets: {response.status_code}")
-            st.write(response.text)
-            break
-        
-        data = response.json()
-        tickets = data.get("tickets", [])
-        if not tickets:
-            break
-        all_tickets.extend(tickets)
-        page += 1
-    return all_tickets
-
-def fetch_replies(ticket_id):
-    url = f"{BASE_URL}/tickets/{ticket_id}/replies?auth_token={API_TOKEN}"
-    response = requests.get(url, headers=HEADERS)
-    
-    if response.status_code != 200:
-        st.error(f"Error fetching replies for ticket {ticket_id}: {response.status_code}")
-        st.write(response.text)
-        return []
-    
-    return response.json().get("replies", [])
-
-def safe_get(dictionary, keys, default=''):
-    for key in keys:
-        if isinstance(dictionary, dict):
-            dictionary = dictionary.get(key, {})
+# Replies are cached on disk keyed by (ticket_id, last_activity_at), so a ticket
+# that hasn't changed since the last run is served without an API call.
+REPLY_CACHE_DIR = ".sb_cache"
+REPLY_CACHE_TTL = 86400  # seconds
+
+# Entries kept in the in-memory LRU in front of the disk cache
+REPLY_MEMO_SIZE = 4096
+
+# Format SupportBee uses for timestamps (ISO 8601, UTC)
+SB_TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Longest Retry-After we honour, in seconds; the script blocks while waiting
+MAX_RETRY_AFTER = 60
+
+# Connection-level failures raised by _get, whichever client is in use
+TRANSPORT_ERRORS = (httpx.TransportError, asyncio.TimeoutError)
+
+# Columns of the exported CSV, in order
+CSV_FIELDNAMES = (
+    'ticket_id', 'date', 'labels', 'ticket_description',
+    'assigned_agent_name', 'first_response_time', 'average_response_time', 'replies'
+)
+
+def open_client(concurrency=16, timeout=30):
+    if HTTP_BACKEND == "aiohttp":
+        return _open_aiohttp_session(concurrency, timeout)
+
+    # One HTTP/2 client shared by pagination and reply fetches: concurrent
+    # requests are multiplexed as streams over a single TLS connection, and
+    # servers without HTTP/2 fall back to pooled keep-alive HTTP/1.1.
+    # http2=True needs the `h2` package (pip install "httpx[http2]").
+    return httpx.AsyncClient(
+        http2=True,
+        base_url=BASE_URL,
+        params=AUTH_PARAMS,
+        headers=HEADERS,
+        limits=httpx.Limits(
+            max_connections=concurrency,
+            max_keepalive_connections=concurrency,
+            keepalive_expiry=30,
+        ),
+        timeout=httpx.Timeout(timeout),
+    )
+
+def _open_aiohttp_session(concurrency, timeout):
+    # aiohttp is only needed for this opt-in backend (SB_HTTP_BACKEND=aiohttp).
+    import aiohttp
+
+    # A keep-alive HTTP/1.1 pool; the DNS answer is cached as well, since
+    # every request goes to the same host.
+    connector = aiohttp.TCPConnector(
+        limit=concurrency,
+        limit_per_host=concurrency,
+        keepalive_timeout=30,
+        ttl_dns_cache=300,
+    )
+    return aiohttp.ClientSession(
+        base_url=BASE_URL,
+        connector=connector,
+        headers=HEADERS,
+        timeout=aiohttp.ClientTimeout(total=timeout),
+    )
+
+def _retry_delay(attempt, retry_after, base):
+    if retry_after is not None:
+        try:
+            return min(max(float(retry_after), 0), MAX_RETRY_AFTER)
+        except ValueError:
+            pass  # an HTTP-date; fall back to exponential backoff
+    return base * 2 ** attempt + random.random() * 0.1
+
+async def _get(client, url, params):
+    # Returns (status, body, Retry-After header) from either client type.
+    # aiohttp connection errors are re-raised as httpx.TransportError.
+    if isinstance(client, httpx.AsyncClient):
+        response = await client.get(url, params=params)
+        return response.status_code, response.content, response.headers.get("Retry-After")
+
+    import aiohttp
+
+    # aiohttp sessions have no default query parameters, so add auth here.
+    try:
+        async with client.get(url, params={**AUTH_PARAMS, **(params or {})}) as response:
+            return response.status, await response.read(), response.headers.get("Retry-After")
+    except aiohttp.ClientError as exc:
+        raise httpx.TransportError(repr(exc)) from exc
+
+async def get_with_retry(client, url, sem, params=None, *, tries=5, base=0.5):
+    # Returns (status, body) of the last attempt; 429/5xx responses and
+    # connection errors are retried, and the final connection error re-raised.
+    for attempt in range(tries):
+        retry_after = None
+        try:
+            async with sem:
+                status, body, retry_after = await _get(client, url, params)
+        except TRANSPORT_ERRORS:
+            if attempt == tries - 1:
+                raise
+            status = None
         else:
-            return default
-    return dictionary if dictionary != {} else default
+            if status not in RETRY_STATUSES or attempt == tries - 1:
+                return status, body
+        # Sleep outside the semaphore so other requests can use the slot.
+        await asyncio.sleep(_retry_delay(attempt, retry_after, base))
 
-def create_csv(tickets):
-    output = io.StringIO()
-    fieldnames = [
-        'ticket_id', 'date', 'labels', 'ticket_description',
-        'assigned_agent_name', 'first_response_time', 'average_response_time', 'replies'
+async def fetch_ticket_page(client, start_date, end_date, page, sem):
+    # Returns (data, error); data is None when error is set.
+    params = {**TICKET_LIST_PARAMS, "since": start_date, "until": end_date, "page": page}
+    try:
+        status, body = await get_with_retry(client, "/tickets", sem, params)
+    except TRANSPORT_ERRORS as exc:
+        return None, f"Error fetching tickets: {exc!r}"
+
+    if status != 200:
+        error = f"Error fetching tickets: {status}"
+        if DEBUG:
+            error += f" {body.decode('utf-8', 'replace')}"
+        return None, error
+
+    return json_loads(body), None
+
+async def iter_ticket_pages(client, start_date, end_date, errors, concurrency=8):
+    # Yields each page's tickets in page order as soon as it arrives; a failed
+    # page ends the listing and its message is appended to `errors`.
+    sem = asyncio.Semaphore(concurrency)
+
+    async def page_tickets(page):
+        data, error = await fetch_ticket_page(client, start_date, end_date, page, sem)
+        if error is not None:
+            errors.append(error)
+        return data
+
+    # Page 1 tells us how many pages there are, so the rest can be
+    # requested concurrently instead of one round-trip at a time.
+    data = await page_tickets(1)
+    tickets = data.get("tickets", []) if data else []
+    if not tickets:
+        return
+    yield tickets
+
+    total_pages = data.get("total_pages")
+    if total_pages is None:
+        # No pagination metadata: walk the remaining pages serially.
+        page = 2
+        while True:
+            data = await page_tickets(page)
+            tickets = data.get("tickets", []) if data else []
+            if not tickets:
+                return
+            yield tickets
+            page += 1
+
+    tasks = [
+        asyncio.ensure_future(fetch_ticket_page(client, start_date, end_date, page, sem))
+        for page in range(2, int(total_pages) + 1)
+    ]
+    try:
+        # All pages are in flight; hand them out in page order and stop at
+        # the first failed or empty page like the serial walk does.
+        for task in tasks:
+            data, error = await task
+            if error is not None:
+                errors.append(error)
+            tickets = data.get("tickets", []) if data else []
+            if not tickets:
+                return
+            yield tickets
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def fetch_replies_async(client, ticket_id, sem):
+    # Returns (ticket_id, replies, error); replies is None when error is set.
+    # Errors are reported by the caller once every fetch has finished.
+    try:
+        status, body = await get_with_retry(
+            client, f"/tickets/{ticket_id}/replies", sem
+        )
+    except TRANSPORT_ERRORS as exc:
+        return ticket_id, None, repr(exc)
+
+    if status != 200:
+        error = str(status)
+        if DEBUG:
+            error += f" {body.decode('utf-8', 'replace')}"
+        return ticket_id, None, error
+
+    data = json_loads(body)
+
+    return ticket_id, data.get("replies", []), None
+
+async def fetch_all_replies(client, ticket_ids, sem):
+    results = {}
+    errors = {}
+    tasks = [
+        asyncio.ensure_future(fetch_replies_async(client, ticket_id, sem))
+        for ticket_id in ticket_ids
     ]
+    for future in asyncio.as_completed(tasks):
+        ticket_id, replies, error = await future
+        results[ticket_id] = replies
+        if error is not None:
+            errors[ticket_id] = error
+    return results, errors
+
+def format_reply_errors(errors, limit=10):
+    # One summary instead of a separate message per failed ticket.
+    shown = ", ".join(f"{ticket_id} ({error})" for ticket_id, error in list(errors.items())[:limit])
+    more = f" and {len(errors) - limit} more" if len(errors) > limit else ""
+    return f"Error fetching replies for {len(errors)} ticket(s): {shown}{more}"
+
+@st.cache_resource
+def _reply_cache():
+    # Opened once per process rather than on every rerun, like _reply_memo.
+    cache = diskcache.Cache(REPLY_CACHE_DIR)
+    if DEBUG:
+        # Hit/miss counting adds a write to every get, so it is debug-only.
+        cache.stats(enable=True)
+    return cache
+
+@st.cache_resource
+def _reply_memo():
+    # Module globals are rebuilt on every Streamlit rerun; a cached resource
+    # survives reruns, so repeat fetches skip the disk cache's unpickling too.
+    return OrderedDict(), threading.Lock()
+
+def _memo_get(key):
+    memo, lock = _reply_memo()
+    with lock:
+        replies = memo.get(key)
+        if replies is not None:
+            memo.move_to_end(key)
+    return replies
+
+def _memo_put(key, replies):
+    memo, lock = _reply_memo()
+    with lock:
+        memo[key] = replies
+        memo.move_to_end(key)
+        while len(memo) > REPLY_MEMO_SIZE:
+            memo.popitem(last=False)
+
+async def fetch_all_replies_cached(client, tickets, sem, force=False):
+    reply_cache = _reply_cache()
+    results = {}
+    misses = {}
+    for ticket in tickets:
+        embedded = ticket.get("replies")
+        if isinstance(embedded, list):
+            # The listing already carried the replies; no request needed.
+            results[ticket["id"]] = embedded
+            continue
+
+        key = ("replies", ticket["id"], ticket.get("last_activity_at"))
+        replies = None
+        if not force:
+            replies = _memo_get(key)
+            if replies is None:
+                replies = reply_cache.get(key)
+                if replies is not None:
+                    _memo_put(key, replies)
+        if replies is None:
+            misses[ticket["id"]] = key
+        else:
+            # Copy so callers can't mutate the memoized list.
+            results[ticket["id"]] = list(replies)
+
+    fetched, errors = await fetch_all_replies(client, list(misses), sem)
+    for ticket_id, replies in fetched.items():
+        # Failed fetches come back as None and are not cached.
+        if replies is not None:
+            reply_cache.set(misses[ticket_id], replies, expire=REPLY_CACHE_TTL)
+            _memo_put(misses[ticket_id], list(replies))
+        results[ticket_id] = replies
+    return results, errors
+
+async def fetch_tickets_with_replies(start_date, end_date, concurrency=16, timeout=30, force=False):
+    # Returns (tickets, errors), with each ticket's replies attached; errors
+    # are messages for the caller to display.
+    errors = []
+    # The semaphore keeps at most `concurrency` reply requests in flight at once,
+    # across all pages.
+    reply_sem = asyncio.Semaphore(concurrency)
+    pages = []
+    reply_tasks = []
+    async with open_client(concurrency, timeout) as client:
+        # Replies for a page are requested as soon as that page arrives, so
+        # reply fetching overlaps with the rest of the pagination.
+        async for tickets in iter_ticket_pages(
+            client, start_date, end_date, errors, concurrency=min(8, concurrency)
+        ):
+            pages.append(tickets)
+            reply_tasks.append(asyncio.ensure_future(
+                fetch_all_replies_cached(client, tickets, reply_sem, force=force)
+            ))
+
+        reply_errors = {}
+        for tickets, (replies_by_id, page_errors) in zip(pages, await asyncio.gather(*reply_tasks)):
+            for ticket in tickets:
+                ticket["replies"] = replies_by_id.get(ticket["id"]) or []
+            reply_errors.update(page_errors)
+
+    if reply_errors:
+        errors.append(format_reply_errors(reply_errors))
+    # Pages are kept as separate lists and flattened once at the end, so the
+    # result is allocated at its final size instead of grown page by page.
+    return list(chain.from_iterable(pages)), errors
+
+@st.cache_data(ttl=600, show_spinner=False)
+def load_tickets(start_date, end_date, concurrency, timeout, _force=False):
+    # Streamlit reruns the script on every interaction (including clicking
+    # the download button); caching here makes those reruns free. `_force`
+    # is left out of the cache key.
+    return asyncio.run(fetch_tickets_with_replies(
+        start_date, end_date, concurrency=concurrency, timeout=timeout, force=_force
+    ))
+
+@st.cache_data(ttl=600, show_spinner=False)
+def build_csv(_tickets, version):
+    # `version` (id, last activity and reply count per ticket) stands in for
+    # hashing the full ticket payloads.
+    return create_csv(_tickets)
+
+def _content_text(d, default=''):
+    content = d.get('content')
+    return content.get('text', default) if isinstance(content, dict) else default
+
+def _assignee_name(d, default='Unassigned'):
+    assignee = d.get('current_user_assignee')
+    return assignee.get('name', default) if isinstance(assignee, dict) else default
+
+def _parse_sb_ts(s):
+    # Returns None for empty or unparseable values rather than raising, so one
+    # bad timestamp can't break the export.
+    if not s or len(s) < 10:
+        return None
+    # fromisoformat covers SupportBee's canonical timestamps; anything else
+    # falls back to the much slower dateutil parser.
+    try:
+        dt = datetime.fromisoformat(s.replace('Z', '+00:00'))
+    except ValueError:
+        try:
+            dt = parser.parse(s)
+        except (ValueError, OverflowError):
+            return None
+    # Keep every value offset-aware so reply/ticket differences never mix
+    # naive and aware datetimes.
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+def _format_date(s):
+    # MM-DD-YYYY. ISO strings are sliced directly; the rest are parsed.
+    if s[4:5] == '-' and s[7:8] == '-':
+        return f"{s[5:7]}-{s[8:10]}-{s[0:4]}"
+    dt = _parse_sb_ts(s)
+    return f"{dt.month:02d}-{dt.day:02d}-{dt.year:04d}" if dt else 'N/A'
 
-    writer = csv.DictWriter(output, fieldnames=fieldnames)
-    writer.writeheader()
+def yield_rows(tickets):
+    # A ticket and its first reply, and replies across a batch, often share
+    # timestamps, so each distinct string is parsed once per export.
+    dt_cache = {}
+
+    def parse_ts(s):
+        try:
+            return dt_cache[s]
+        except KeyError:
+            # None results are cached too, so bad strings are tried only once.
+            dt = dt_cache[s] = _parse_sb_ts(s)
+            return dt
 
     for ticket in tickets:
         ticket_id = ticket.get('id', 'N/A')
         date_str = ticket.get('last_activity_at', '')
-        date = datetime.strptime(date_str, '%Y-%m-%dT%H:%M:%SZ').strftime('%m-%d-%Y') if date_str else 'N/A'
+        date = _format_date(date_str) if date_str else 'N/A'
         labels = [label.get('name', '') for label in ticket.get('labels', [])]
         labels_str = ', '.join(labels)
-        ticket_description = safe_get(ticket, ['content', 'text'], default='No description')
-        assigned_agent_name = safe_get(ticket, ['current_user_assignee', 'name'], default='Unassigned')
+        ticket_description = _content_text(ticket, default='No description')
+        assigned_agent_name = _assignee_name(ticket)
         replies = ticket.get('replies', [])
+        # Parse each reply's timestamp once and sort (created_at, parsed, reply)
+        # triples on the raw ISO string, which orders chronologically.
+        sorted_replies = []
+        for reply in replies:
+            # `or ''` also covers an explicit null, which can't be sorted with strings.
+            created_at_str = reply.get('created_at') or ''
+            created_at = parse_ts(created_at_str)
+            sorted_replies.append((created_at_str, created_at, reply))
+        sorted_replies.sort(key=itemgetter(0))
+        ticket_created_at = parse_ts(ticket.get('created_at', ''))
         all_replies = []
-
-        for reply in sorted(replies, key=lambda x: x.get('created_at', '')):
-            reply_type = 'Agent' if reply.get('agent') else 'Customer'
-            reply_text = safe_get(reply, ['content', 'text'], default='')
-            all_replies.append(f"{reply_type}: {reply_text}")
-
-        combined_replies = "\n".join(all_replies)
-        ticket_created_at_str = ticket.get('created_at', '')
-        ticket_created_at = parser.parse(ticket_created_at_str) if ticket_created_at_str else None
         first_agent_reply_time = None
         response_times = []
         previous_message_time = ticket_created_at
 
-        for reply in sorted(replies, key=lambda x: x.get('created_at', '')):
-            reply_created_at_str = reply.get('created_at', '')
-            reply_created_at = parser.parse(reply_created_at_str) if reply_created_at_str else None
+        # One pass builds the reply text and the response-time stats together.
+        for _, reply_created_at, reply in sorted_replies:
+            is_agent = reply.get('agent')
+            reply_type = 'Agent' if is_agent else 'Customer'
+            # Inlined _content_text: this runs once per reply.
+            content = reply.get('content')
+            reply_text = content.get('text', '') if isinstance(content, dict) else ''
+            all_replies.append(f"{reply_type}: {reply_text}")
 
             if reply_created_at and previous_message_time:
                 time_diff = (reply_created_at - previous_message_time).total_seconds() / 3600
-                if reply.get('agent'):
+                if is_agent:
                     response_times.append(time_diff)
                     if not first_agent_reply_time:
                         first_agent_reply_time = reply_created_at
                 previous_message_time = reply_created_at
 
+        combined_replies = "\n".join(all_replies)
         first_response_time = (first_agent_reply_time - ticket_created_at).total_seconds() / 3600 if ticket_created_at and first_agent_reply_time else None
         average_response_time = sum(response_times) / len(response_times) if response_times else None
 
-        row_data = {
-            'ticket_id': ticket_id,
-            'date': date,
-            'labels': labels_str,
-            'ticket_description': ticket_description,
-            'assigned_agent_name': assigned_agent_name,
-            'first_response_time': first_response_time,
-            'average_response_time': average_response_time,
-            'replies': combined_replies
-        }
-        writer.writerow(row_data)
+        # Positional row, in CSV_FIELDNAMES order
+        yield (
+            ticket_id,
+            date,
+            labels_str,
+            ticket_description,
+            assigned_agent_name,
+            first_response_time,
+            average_response_time,
+            combined_replies,
+        )
 
-    return output.getvalue()
+def create_csv(tickets):
+    # Rows are encoded straight into a bytes buffer as they are produced, so
+    # the export is never held as a str and a bytes copy at the same time.
+    buf = io.BytesIO()
+    text = io.TextIOWrapper(buf, encoding='utf-8', newline='', write_through=True)
+    writer = csv.writer(text)
+    writer.writerow(CSV_FIELDNAMES)
+    writer.writerows(yield_rows(tickets))
+
+    text.flush()
+    text.detach()
+    return buf.getvalue()
 
 def main():
     st.title("Support Ticket Downloader")
     start_date = st.date_input("Start Date", datetime.now() - timedelta(days=30))
     end_date = st.date_input("End Date", datetime.now())
-    start_date_str = start_date.strftime('%Y-%m-%dT%H:%M:%SZ')
-    end_date_str = end_date.strftime('%Y-%m-%dT%H:%M:%SZ')
+    start_date_str = start_date.strftime(SB_TIMESTAMP_FORMAT)
+    end_date_str = end_date.strftime(SB_TIMESTAMP_FORMAT)
+
+    n_parallel = st.sidebar.slider("Parallel requests", min_value=1, max_value=64, value=16)
+    timeout = st.sidebar.number_input("Request timeout (seconds)", min_value=1, max_value=300, value=30)
+    force_refresh = st.sidebar.checkbox("Force refresh (ignore reply cache)")
 
     if st.button("Fetch and Download Tickets"):
-        with st.spinner("Fetching tickets..."):
-            tickets = fetch_all_tickets(start_date_str, end_date_str)
-            if not tickets:
-                st.warning("No tickets found for the selected date range.")
-                return
+        fetch_args = (start_date_str, end_date_str, int(n_parallel), int(timeout))
+        st.session_state["fetch_args"] = fetch_args
+        # Only a click starts a new fetch; replace this session's last result.
+        st.session_state.pop("fetch_result", None)
+        if force_refresh:
+            load_tickets.clear(*fetch_args)
 
-            for ticket in tickets:
-                ticket_id = ticket["id"]
-                replies = fetch_replies(ticket_id)
-                ticket["replies"] = replies
-
-            csv_content = create_csv(tickets)
-            csv_bytes = csv_content.encode('utf-8')  # Convert to bytes for download
-            
-            st.success(f"Fetched {len(tickets)} tickets.")
-            st.download_button(
-                label="Download Tickets CSV",
-                data=csv_bytes,
-                file_name='tickets.csv',
-                mime='text/csv',
-            )
+    # The last requested fetch stays on screen across reruns. Its result is
+    # kept in the session, so reruns (including the download click) make no
+    # requests even when the fetch was partial.
+    fetch_args = st.session_state.get("fetch_args")
+    if fetch_args:
+        result = st.session_state.get("fetch_result")
+        if result is None or result[0] != fetch_args:
+            with st.spinner("Fetching tickets..."):
+                tickets, errors = load_tickets(*fetch_args, _force=force_refresh)
+            if errors:
+                # Don't share a partial result through the cache; the next
+                # click for these arguments fetches again.
+                load_tickets.clear(*fetch_args)
+            st.session_state["fetch_result"] = (fetch_args, tickets, errors)
+        else:
+            _, tickets, errors = result
+        for error in errors:
+            st.error(error)
+        if not tickets:
+            st.warning("No tickets found for the selected date range.")
+            return
+
+        version = tuple(
+            (ticket["id"], ticket.get("last_activity_at"), len(ticket["replies"]))
+            for ticket in tickets
+        )
+
+        st.success(f"Fetched {len(tickets)} tickets.")
+        # The CSV is built on click, off the script thread, so the button
+        # shows up as soon as the fetch finishes.
+        st.download_button(
+            label="Download Tickets CSV",
+            data=lambda: build_csv(tickets, version),
+            file_name='tickets.csv',
+            mime='text/csv',
+        )
+
+    if DEBUG:
+        with st.expander("Debug: reply cache"):
+            reply_cache = _reply_cache()
+            hits, misses = reply_cache.stats()
+            st.write(f"Entries: {len(reply_cache)}, hits: {hits}, misses: {misses}")
+            st.write(f"In-memory entries: {len(_reply_memo()[0])}")
 
 if __name__ == "__main__":
     main()